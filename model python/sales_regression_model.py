@@ -9,10 +9,12 @@ from __future__ import annotations
 import argparse
 import json
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 from typing import Dict, Tuple, Union
 
 import joblib
+import numpy as np
 import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import RandomForestRegressor
@@ -20,7 +22,7 @@ from sklearn.impute import SimpleImputer
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
 
 # --------------------------------------------------------------------------------------
 # Configuration
@@ -116,38 +118,62 @@ def load_dataset(csv_path: Path) -> pd.DataFrame:
     return pd.read_csv(csv_path)
 
 
+def _calendar_features(invoice_dates: pd.Series) -> Dict[str, np.ndarray]:
+    """Decompose invoice timestamps into calendar features from a single datetime buffer.
+
+    Missing timestamps yield NaN for every field except the weekend flag, which is 0,
+    matching the behaviour of the equivalent ``.dt`` accessors. Timezone-aware dates are
+    decomposed on their local wall-clock time, as ``.dt`` does, not on UTC.
+    """
+    if invoice_dates.dt.tz is not None:
+        invoice_dates = invoice_dates.dt.tz_localize(None)
+    timestamps = invoice_dates.to_numpy(dtype="datetime64[s]")
+    missing = np.isnat(timestamps)
+
+    days = timestamps.astype("datetime64[D]")
+    months = timestamps.astype("datetime64[M]")
+    years = timestamps.astype("datetime64[Y]")
+
+    # 1970-01-01 was a Thursday; shift so Monday == 0 like pandas' dayofweek.
+    day_of_week = (days.view("int64") + 3) % 7
+
+    fields = {
+        "InvoiceYear": years.view("int64") + 1970,
+        "InvoiceMonth": months.view("int64") % 12 + 1,
+        "InvoiceDay": (days - months).view("int64") + 1,
+        "InvoiceHour": (timestamps - days).astype("timedelta64[h]").view("int64"),
+        "InvoiceDayOfWeek": day_of_week,
+    }
+    features = {
+        name: np.where(missing, np.nan, values) for name, values in fields.items()
+    }
+    features["InvoiceIsWeekend"] = ((day_of_week >= 5) & ~missing).astype(float)
+    return features
+
+
 def engineer_features(
     df: pd.DataFrame, *, include_target: bool = True
 ) -> Union[Tuple[pd.DataFrame, pd.Series], pd.DataFrame]:
-    data = df.copy()
-
-    # Clean numeric columns we rely on for the target.
-    data["Quantity"] = pd.to_numeric(data["Quantity"], errors="coerce")
-    data["Price"] = pd.to_numeric(data["Price"], errors="coerce")
-
-    # Convert invoice date to datetime and derive calendar/time features.
-    data["InvoiceDate"] = pd.to_datetime(data["InvoiceDate"], errors="coerce")
-    data["InvoiceYear"] = data["InvoiceDate"].dt.year
-    data["InvoiceMonth"] = data["InvoiceDate"].dt.month
-    data["InvoiceDay"] = data["InvoiceDate"].dt.day
-    data["InvoiceHour"] = data["InvoiceDate"].dt.hour
-    data["InvoiceDayOfWeek"] = data["InvoiceDate"].dt.dayofweek
-    data["InvoiceIsWeekend"] = (
-        (data["InvoiceDate"].dt.dayofweek >= 5).astype(float)
+    # Clean numeric columns we rely on for the target and derive calendar/time features
+    # from the invoice date. ``assign`` leaves ``df`` untouched and, with pandas
+    # Copy-on-Write enabled, shares every column it does not replace.
+    quantity = pd.to_numeric(df["Quantity"], errors="coerce")
+    price = pd.to_numeric(df["Price"], errors="coerce")
+    invoice_dates = pd.to_datetime(df["InvoiceDate"], errors="coerce")
+
+    data = df.assign(
+        Quantity=quantity,
+        Price=price,
+        **_calendar_features(invoice_dates),
+        # Target variable: line-item revenue.
+        **{TARGET_COLUMN: quantity * price},
     )
 
-    # Target variable: line-item revenue.
-    data[TARGET_COLUMN] = data["Quantity"] * data["Price"]
-
     # Remove rows where we cannot compute revenue during supervised training.
     if include_target:
         data = data.dropna(subset=[TARGET_COLUMN])
 
-    # Drop columns we no longer need.
-    if "InvoiceDate" in data.columns:
-        data = data.drop(columns=["InvoiceDate"])
-
-    features = data[NUMERIC_FEATURES + CATEGORICAL_FEATURES]
+    features = data.loc[:, NUMERIC_FEATURES + CATEGORICAL_FEATURES]
 
     if include_target:
         target = data[TARGET_COLUMN]
@@ -164,6 +190,8 @@ def build_pipeline(args: argparse.Namespace) -> Pipeline:
                 "scaler",
                 StandardScaler(),  # helps stabilize feature distributions
             ),
+            # Trees split on float32 internally; emit that directly to avoid a cast per predict.
+            ("to_float32", FunctionTransformer(partial(np.asarray, dtype=np.float32))),
         ]
     )
 
@@ -172,7 +200,9 @@ def build_pipeline(args: argparse.Namespace) -> Pipeline:
             ("imputer", SimpleImputer(strategy="most_frequent")),
             (
                 "encoder",
-                OneHotEncoder(handle_unknown="ignore", sparse_output=True),
+                OneHotEncoder(
+                    handle_unknown="ignore", sparse_output=True, dtype=np.float32
+                ),
             ),
         ]
     )
@@ -217,7 +247,8 @@ def save_artifacts(model: Pipeline, metrics: Dict[str, float], artifacts: Traini
     artifacts.metrics_path.parent.mkdir(parents=True, exist_ok=True)
 
     print(f"\nSaving trained model to {artifacts.model_path} ...")
-    joblib.dump(model, artifacts.model_path)
+    # Keep the artifact uncompressed so the server can memory-map its arrays.
+    joblib.dump(model, artifacts.model_path, compress=0)
 
     print(f"Saving metrics to {artifacts.metrics_path} ...")
     artifacts.metrics_path.write_text(json.dumps(metrics, indent=2))
@@ -225,6 +256,7 @@ def save_artifacts(model: Pipeline, metrics: Dict[str, float], artifacts: Traini
 
 def main() -> None:
     args = parse_args()
+    pd.set_option("mode.copy_on_write", True)
 
     dataset = load_dataset(args.data_path)
     X, y = engineer_features(dataset)
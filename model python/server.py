@@ -1,14 +1,20 @@
 """Flask API for serving the trained sales revenue prediction model."""
 from __future__ import annotations
 
+import gc
+import hashlib
 import json
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, Iterable, List
 
 import joblib
+import orjson
 import pandas as pd
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from sales_regression_model import (
     DEFAULT_MODEL_PATH,
@@ -17,6 +23,8 @@ from sales_regression_model import (
     engineer_features,
 )
 
+pd.set_option("mode.copy_on_write", True)
+
 app = Flask(__name__)
 
 MODEL_PATH = Path(os.getenv("MODEL_PATH", DEFAULT_MODEL_PATH))
@@ -30,19 +38,45 @@ REQUIRED_COLUMNS = [
     "Customer ID",
     "Country",
 ]
+_REQUIRED_COLUMN_SET = frozenset(REQUIRED_COLUMNS)
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 128))
+MAX_PAYLOAD_BYTES = int(os.getenv("MAX_PAYLOAD_BYTES", 10 * 1024 * 1024))
+PREDICT_N_JOBS = int(v) if (v := os.getenv("PREDICT_N_JOBS")) else None
+
+# Werkzeug compares this against Content-Length before the body is read.
+app.config["MAX_CONTENT_LENGTH"] = MAX_PAYLOAD_BYTES
 
 _model = None
+_preprocessor = None
+_regressor = None
+_model_lock = threading.Lock()
+_prediction_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+_prediction_cache_lock = threading.Lock()
 
 
 def load_trained_model() -> Any:
-    global _model
+    global _model, _preprocessor, _regressor
     if _model is None:
-        if not MODEL_PATH.exists():
-            raise FileNotFoundError(
-                f"Model file not found at {MODEL_PATH}. Train the model first by running sales_regression_model.py."
-            )
-        app.logger.info("Loading model from %s", MODEL_PATH)
-        _model = joblib.load(MODEL_PATH)
+        with _model_lock:
+            if _model is None:
+                if not MODEL_PATH.exists():
+                    raise FileNotFoundError(
+                        f"Model file not found at {MODEL_PATH}. Train the model first by running sales_regression_model.py."
+                    )
+                app.logger.info("Loading model from %s", MODEL_PATH)
+                # mmap_mode keeps plain arrays (imputer/scaler statistics) file-backed, but
+                # sklearn copies every tree's nodes onto the heap when unpickling. Workers
+                # share the forest only by loading before fork (gunicorn --preload).
+                model = joblib.load(MODEL_PATH, mmap_mode="r")
+                # Keep the fitted steps around so predictions can skip Pipeline dispatch.
+                _preprocessor = model.named_steps["preprocessor"]
+                _regressor = model.named_steps["regressor"]
+                if PREDICT_N_JOBS is not None:
+                    # The forest is trained with n_jobs=-1; threaded servers should cap it
+                    # so concurrent requests do not each fan out over every core.
+                    _regressor.n_jobs = PREDICT_N_JOBS
+                _model = model
     return _model
 
 
@@ -62,10 +96,11 @@ def _normalize_payload(payload: Any) -> List[Dict[str, Any]]:
 def _validate_records(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
     validated = []
     for idx, record in enumerate(records):
-        if not isinstance(record, dict):
+        if type(record) is not dict:
             raise ValueError(f"Record at position {idx} is not a JSON object.")
-        missing = [col for col in REQUIRED_COLUMNS if col not in record]
-        if missing:
+        if not _REQUIRED_COLUMN_SET.issubset(record):
+            # Only rebuild the ordered list on the error path to keep the message stable.
+            missing = [col for col in REQUIRED_COLUMNS if col not in record]
             raise ValueError(
                 f"Record at position {idx} is missing required fields: {', '.join(missing)}"
             )
@@ -74,7 +109,8 @@ def _validate_records(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]
 
 
 def _prepare_features(records: List[Dict[str, Any]]) -> pd.DataFrame:
-    df = pd.DataFrame(records)
+    # Build the frame column by column; validated records carry every required field.
+    df = pd.DataFrame({col: [record[col] for record in records] for col in REQUIRED_COLUMNS})
     features = engineer_features(df, include_target=False)
     missing_columns = [
         col for col in NUMERIC_FEATURES + CATEGORICAL_FEATURES if col not in features.columns
@@ -87,6 +123,44 @@ def _prepare_features(records: List[Dict[str, Any]]) -> pd.DataFrame:
     return features
 
 
+def _payload_key(records: List[Dict[str, Any]]) -> bytes:
+    canonical = json.dumps(records, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+def _score_records(records: List[Dict[str, Any]]) -> List[float]:
+    features = _prepare_features(records)
+    load_trained_model()
+    transformed = _preprocessor.transform(features)
+    return [float(pred) for pred in _regressor.predict(transformed)]
+
+
+def _predict_records(records: List[Dict[str, Any]]) -> List[float]:
+    """Predict revenue for validated records, reusing results for repeated payloads.
+
+    The loaded model never changes, so identical payloads (e.g. a dashboard polling the
+    same records) are served from a small LRU cache keyed on a digest of the records.
+    With ``PREDICTION_CACHE_SIZE <= 0`` the cache, including the key, is skipped entirely.
+    """
+    if PREDICTION_CACHE_SIZE <= 0:
+        return _score_records(records)
+
+    key = _payload_key(records)
+    with _prediction_cache_lock:
+        cached = _prediction_cache.get(key)
+        if cached is not None:
+            _prediction_cache.move_to_end(key)
+            return cached
+
+    predictions = _score_records(records)
+
+    with _prediction_cache_lock:
+        _prediction_cache[key] = predictions
+        while len(_prediction_cache) > PREDICTION_CACHE_SIZE:
+            _prediction_cache.popitem(last=False)
+    return predictions
+
+
 @app.route("/health", methods=["GET"])
 def health() -> Any:
     return jsonify({"status": "ok", "model_path": str(MODEL_PATH)})
@@ -98,28 +172,35 @@ def predict() -> Any:
         payload = request.get_json(force=True)
         records = _normalize_payload(payload)
         validated_records = _validate_records(records)
-        features = _prepare_features(validated_records)
-
-        model = load_trained_model()
-        predictions = model.predict(features)
-
-        response_payload = [
-            {
-                "Invoice": record["Invoice"],
-                "predicted_revenue": float(pred),
-            }
-            for record, pred in zip(validated_records, predictions)
-        ]
-
-        return jsonify(
-            {
-                "predictions": response_payload,
-                "metadata": {
-                    "num_predictions": len(response_payload),
-                    "required_features": REQUIRED_COLUMNS,
-                    "feature_columns": NUMERIC_FEATURES + CATEGORICAL_FEATURES,
-                },
-            }
+        predictions = _predict_records(validated_records)
+
+        response_payload = {
+            "predictions": [
+                {"Invoice": record["Invoice"], "predicted_revenue": pred}
+                for record, pred in zip(validated_records, predictions)
+            ],
+            "metadata": {
+                "num_predictions": len(predictions),
+                "required_features": REQUIRED_COLUMNS,
+                "feature_columns": NUMERIC_FEATURES + CATEGORICAL_FEATURES,
+            },
+        }
+        # Serialize straight to bytes with orjson. It rejects integers outside the 64-bit
+        # range (e.g. oversized Invoice numbers), which the stdlib encoder still accepts.
+        try:
+            body = orjson.dumps(response_payload)
+        except orjson.JSONEncodeError:
+            return jsonify(response_payload)
+        return Response(body, mimetype="application/json")
+    except RequestEntityTooLarge:
+        return (
+            jsonify(
+                {
+                    "error": f"Payload exceeds the {MAX_PAYLOAD_BYTES} byte limit.",
+                    "hint": "Split large batches into several requests.",
+                }
+            ),
+            413,
         )
     except Exception as exc:  # broad exception turned into JSON response for API clients
         app.logger.exception("Prediction failed")
@@ -134,6 +215,22 @@ def predict() -> Any:
         )
 
 
+# Load eagerly when the artifact is already present so the first request does not pay
+# the deserialization cost and preloaded WSGI workers inherit the loaded model. A bad
+# artifact must not break the import; /predict retries the load and reports the error.
+if MODEL_PATH.exists():
+    try:
+        load_trained_model()
+    except Exception:
+        app.logger.exception("Eager model load failed; falling back to loading on first request")
+    else:
+        # Move the loaded model into the permanent GC generation so collections in forked
+        # workers never touch its objects and keep its copy-on-write pages shared.
+        gc.freeze()
+
+
 if __name__ == "__main__":
+    # Fail fast for the dev server: a no-op after a successful eager load, otherwise
+    # raises the missing/corrupt artifact error instead of serving 400s.
     load_trained_model()
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)), debug=False)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sales_regression_model import _calendar_features
+
+
+def _expected_fields(invoice_dates: pd.Series) -> dict:
+    return {
+        "InvoiceYear": invoice_dates.dt.year,
+        "InvoiceMonth": invoice_dates.dt.month,
+        "InvoiceDay": invoice_dates.dt.day,
+        "InvoiceHour": invoice_dates.dt.hour,
+        "InvoiceDayOfWeek": invoice_dates.dt.dayofweek,
+        "InvoiceIsWeekend": (invoice_dates.dt.dayofweek >= 5).astype(float),
+    }
+
+
+@pytest.mark.parametrize(
+    "raw_dates, tz",
+    [
+        (
+            [
+                "2011-12-09 12:34:00",
+                "1969-12-31 23:59:59",
+                "1900-02-28 06:00:00",
+                "2024-02-29 00:00:01",
+                "2010-01-03 05:00:00",
+                "not a date",
+                None,
+            ],
+            None,
+        ),
+        (
+            [
+                "2010-12-01T08:26:00+01:00",
+                "2010-12-04T23:30:00+01:00",
+                "2010-12-05T00:15:00+01:00",
+                None,
+            ],
+            "Europe/Paris",
+        ),
+    ],
+)
+def test_calendar_features_match_dt_accessors(raw_dates, tz):
+    invoice_dates = pd.to_datetime(pd.Series(raw_dates), errors="coerce", format="mixed")
+    if tz is not None:
+        invoice_dates = invoice_dates.dt.tz_convert(tz)
+
+    features = _calendar_features(invoice_dates)
+
+    for name, expected in _expected_fields(invoice_dates).items():
+        np.testing.assert_array_equal(
+            features[name], expected.to_numpy(dtype=float), err_msg=name
+        )
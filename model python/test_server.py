@@ -0,0 +1,124 @@
+import argparse
+from collections import OrderedDict
+
+import joblib
+import pandas as pd
+import pytest
+
+import server
+from sales_regression_model import build_pipeline, engineer_features
+
+
+def _record(i: int) -> dict:
+    return {
+        "Invoice": str(536365 + i),
+        "StockCode": ["85123A", "71053", "22752"][i % 3],
+        "Description": ["WHITE HANGING HEART", "WHITE METAL LANTERN", "SET 7 BABUSHKA"][i % 3],
+        "Quantity": 1 + i % 12,
+        "InvoiceDate": f"2010-12-{1 + i % 28:02d} {8 + i % 10:02d}:26:00",
+        "Price": 0.5 + (i % 7) * 0.85,
+        "Customer ID": 17850 + i % 5,
+        "Country": "France" if i % 4 == 0 else "United Kingdom",
+    }
+
+
+@pytest.fixture
+def trained_server(tmp_path, monkeypatch):
+    X, y = engineer_features(pd.DataFrame([_record(i) for i in range(200)]))
+    model = build_pipeline(argparse.Namespace(n_estimators=5, max_depth=None, random_state=0))
+    model.fit(X, y)
+    model_path = tmp_path / "model.joblib"
+    joblib.dump(model, model_path)
+
+    monkeypatch.setattr(server, "MODEL_PATH", model_path)
+    monkeypatch.setattr(server, "_model", None)
+    monkeypatch.setattr(server, "_preprocessor", None)
+    monkeypatch.setattr(server, "_regressor", None)
+    monkeypatch.setattr(server, "_prediction_cache", OrderedDict())
+    return server
+
+
+@pytest.fixture
+def scoring_calls(trained_server, monkeypatch):
+    calls = []
+    score_records = trained_server._score_records
+
+    def counting_score_records(records):
+        calls.append(len(records))
+        return score_records(records)
+
+    monkeypatch.setattr(trained_server, "_score_records", counting_score_records)
+    return calls
+
+
+def test_repeated_payload_is_served_from_cache(trained_server, scoring_calls):
+    records = [_record(1), _record(2)]
+
+    first = trained_server._predict_records(records)
+    second = trained_server._predict_records([dict(record) for record in records])
+
+    assert second == first
+    assert scoring_calls == [2]
+
+
+def test_cache_evicts_least_recently_used_payload(trained_server, scoring_calls, monkeypatch):
+    monkeypatch.setattr(trained_server, "PREDICTION_CACHE_SIZE", 1)
+
+    trained_server._predict_records([_record(1)])
+    trained_server._predict_records([_record(2)])
+    trained_server._predict_records([_record(1)])
+
+    assert scoring_calls == [1, 1, 1]
+    assert len(trained_server._prediction_cache) == 1
+
+
+def test_disabled_cache_skips_key_and_storage(trained_server, scoring_calls, monkeypatch):
+    monkeypatch.setattr(trained_server, "PREDICTION_CACHE_SIZE", 0)
+
+    def fail_payload_key(records):
+        raise AssertionError("payload key computed with the cache disabled")
+
+    monkeypatch.setattr(trained_server, "_payload_key", fail_payload_key)
+
+    first = trained_server._predict_records([_record(1)])
+    second = trained_server._predict_records([_record(1)])
+
+    assert second == first
+    assert scoring_calls == [1, 1]
+    assert not trained_server._prediction_cache
+
+
+@pytest.fixture
+def client(trained_server):
+    return trained_server.app.test_client()
+
+
+def test_predict_serializes_with_orjson(client):
+    response = client.post("/predict", json={"records": [_record(1), _record(2)]})
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    # orjson keeps insertion order and emits no trailing newline, unlike jsonify.
+    assert response.data.startswith(b'{"predictions":[{"Invoice":"536366",')
+    assert not response.data.endswith(b"\n")
+    body = response.get_json()
+    assert [item["Invoice"] for item in body["predictions"]] == ["536366", "536367"]
+    assert body["metadata"]["num_predictions"] == 2
+
+
+def test_predict_falls_back_to_jsonify_for_integers_beyond_64_bits(client):
+    response = client.post("/predict", json=dict(_record(1), Invoice=2**70))
+
+    assert response.status_code == 200
+    assert response.get_json()["predictions"][0]["Invoice"] == 2**70
+
+
+def test_predict_rejects_oversized_body_with_413(trained_server, client, monkeypatch):
+    monkeypatch.setattr(trained_server, "MAX_PAYLOAD_BYTES", 2000)
+    monkeypatch.setitem(trained_server.app.config, "MAX_CONTENT_LENGTH", 2000)
+
+    response = client.post("/predict", json={"records": [_record(i) for i in range(30)]})
+
+    # Must be caught before the broad handler, which would turn it into a 400.
+    assert response.status_code == 413
+    assert response.get_json()["error"] == "Payload exceeds the 2000 byte limit."